@@ -1,3 +1,5 @@
+__all__ = ["SVGO_BASE_CONFIG", "SVGO_CONFIG"]
+
 SVGO_BASE_CONFIG = {
 	"multipass": True,
 	"floatPrecision": 5,
@@ -1,29 +1,69 @@
-import itertools
+import functools
+import io
+import os
 import subprocess
 import pathlib
 import glob
 import re
-import xml.dom.minidom as dom
-import xml.etree.ElementTree as ET
+import shutil
 import svgelements as svg
 import json
 import copy
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from lxml import etree as ET
 from svgelements import Color, Path, Point
 from utils import (
 	are_two_points_close,
 	color_to_index,
 	component_name_from_info,
-	filter_newer,
 	options_object_to_array,
 	parse_filename,
 )
-from tqdm.contrib.concurrent import thread_map
-from utils import NODES_AND_PATHS
+from tqdm.contrib.concurrent import process_map, thread_map
+from utils import get_nodes_and_paths
 from settings import SVGO_BASE_CONFIG, SVGO_CONFIG
 
 
+def _pack_rgb(color: Color) -> int:
+	return (color.red << 16) | (color.green << 8) | color.blue
+
+
+# line colors reserved for the text anchor point and the zero lines; the metadata lines are
+# drawn with exactly these colors, so packed-RGB equality replaces Color.distance_sq
+_TEXT_LINE_COLORS = (svg.Color("#f00"), svg.Color("rgb(255,0,155)"))
+_ZERO_LINE_COLORS = (svg.Color("#ff0"), svg.Color("#0ff"))
+_TEXT_LINE_RGB = _pack_rgb(_TEXT_LINE_COLORS[0])
+_RESERVED_LINE_RGBS = frozenset(_pack_rgb(c) for c in _ZERO_LINE_COLORS + _TEXT_LINE_COLORS)
+
+# shared svgo config inside the build directory, written once per run by convert_DVI_to_SVGs
+_SVGO_CONFIG_NAME = "svgo.config.js"
+# staging directory inside the build directory; svgo optimizes it in a single batched run
+_SVGO_BATCH_DIR = ".svgo"
+
+_URL_REF_RE = re.compile(r"url\(#([^)]+)\)")
+
+
+def _prefix_ids(svg_doc: ET.Element, prefix: str):
+	"""
+	Prefixes element ids and their references so they stay unique once all
+	symbols are combined into one document (replaces svgo's prefixIds plugin,
+	which forced a different config file per input).
+	"""
+	for element in svg_doc.iter():
+		id_value = element.get("id")
+		if id_value is not None:
+			element.set("id", f"{prefix}_{id_value}")
+		for attribute in ("href", "{http://www.w3.org/1999/xlink}href"):
+			reference = element.get(attribute)
+			if reference is not None and reference.startswith("#"):
+				element.set(attribute, f"#{prefix}_{reference[1:]}")
+		for attribute, value in element.items():
+			if "url(#" in value:
+				element.set(attribute, _URL_REF_RE.sub(rf"url(#{prefix}_\1)", value))
+
+
 def _compile_DVI_to_SVG_worker(path: pathlib.Path, translateX=0, translateY=0, scale=1):
 	command = [
 		"dvisvgm",
@@ -40,20 +80,35 @@ def _compile_DVI_to_SVG_worker(path: pathlib.Path, translateX=0, translateY=0, s
 		command.append("--scale=" + str(scale))
 	command.append(path.absolute().as_posix())
 
-	p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, cwd=path.parent)
-	out, _ = p.communicate()
-	return out.decode()
+	p = subprocess.run(command, capture_output=True, check=False, cwd=path.parent)
+	return p.stdout.decode()
 
 
-def svg_path_to_line(path: ET.Element):
-	d = Path(path.get("d"))
-	if len(d) != 2:
-		return None
+# path commands (the exponent letters e/E are excluded) and numbers inside a "d" attribute
+_D_COMMAND_RE = re.compile(r"[A-DF-Za-df-z]")
+_D_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
 
-	path_stroke = path.get("stroke")
 
+def svg_path_to_line(path: ET.Element):
+	path_stroke = path.get("stroke")
 	if path_stroke is None or path_stroke == "":
 		return None
+
+	d_attribute = path.get("d")
+	# fast path: the pin lines are plain "M x y L x y" paths, whose four numbers parse
+	# directly without building a full svgelements Path segment list
+	if _D_COMMAND_RE.findall(d_attribute) == ["M", "L"]:
+		numbers = _D_NUMBER_RE.findall(d_attribute)
+		if len(numbers) == 4:
+			return {
+				"start": Point(float(numbers[0]), float(numbers[1])),
+				"end": Point(float(numbers[2]), float(numbers[3])),
+				"color": Color(path_stroke),
+			}
+
+	d = Path(d_attribute)
+	if len(d) != 2:
+		return None
 	line = {
 		"start": d[-1].start,
 		"end": d[-1].end,
@@ -62,36 +117,36 @@ def svg_path_to_line(path: ET.Element):
 	return line
 
 
-def is_option_active(option_name, options):
-	for option in options:
-		if option_name == option["name"]:
-			return True
-	return False
-
-
-def find_matching_line_point(lines: list[dict]):
-	points = [[line["start"], line["end"]] for line in lines]
-	points = list(itertools.chain.from_iterable(points))  # flatten list
-
-	acc: dict[Point, int] = {points[0]: 1}
-	for point in points[1:]:
-		close = next(
-			(k for k in acc.keys() if k and point and are_two_points_close(k, point)),
-			None,
-		)
-		if close is not None:
-			acc[close] += 1
-		else:
-			acc[point] = 1
-
-	point = None
-	max_count = 0
-	for entry in acc:
-		if acc[entry] > max_count:
-			point = entry
-			max_count = acc[entry]
-
-	return point
+# relative offsets of the 8 grid cells surrounding a quantized point
+_NEIGHBOR_OFFSETS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0))
+
+
+def find_matching_line_point(lines: list[dict], eps=1e-6):
+	# Quantize the coordinates to an eps-sized grid; counting coincident points then is a
+	# single dict pass instead of comparing every point against every seen point.
+	counts: dict[tuple, int] = {}
+	representative: dict[tuple, Point] = {}
+	for line in lines:
+		for point in (line["start"], line["end"]):
+			if point is None:
+				continue
+			x_cell = round(point.x / eps)
+			y_cell = round(point.y / eps)
+			key = (x_cell, y_cell)
+			if key not in counts:
+				# points within eps of each other can straddle a cell boundary;
+				# merge into an already-seen neighboring bucket instead of starting a new one
+				for dx, dy in _NEIGHBOR_OFFSETS:
+					neighbor = (x_cell + dx, y_cell + dy)
+					if neighbor in counts:
+						key = neighbor
+						break
+			counts[key] = counts.get(key, 0) + 1
+			representative.setdefault(key, point)
+
+	if len(counts) == 0:
+		return None
+	return representative[max(counts, key=counts.get)]
 
 
 @dataclass
@@ -102,8 +157,7 @@ class Pin_Anchor:
 
 
 def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_description, ID, option_possibility):
-	svg_doc = ET.fromstring(svg_content)
-	parent_map = {c: p for p in svg_doc.iter() for c in p}
+	svg_doc = ET.fromstring(svg_content.encode())
 	# extract colored, non-filled metadata lines
 	paths = svg_doc.findall(".//path")
 	lines = []
@@ -115,16 +169,19 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 		if svg_line is None:
 			continue
 		lines.append(svg_line)
-		parent_map[path].remove(path)
-		# path.find("..").remove(path)
+		path.getparent().remove(path)
 
+	# hoist the repeated description lookups into locals
 	tikz_name = node_description["name"] if is_node else node_description["drawName"]
+	description_pins = node_description.get("pins", [])
+	description_options = node_description.get("options")
 
-	errorcode = 0
+	if ID is None:
+		ID = component_name_from_info(None, tikz_name, is_node, description_options)
 
-	# the line corresponding to the text anchor point
-	text_line_colors = [svg.Color("#f00"), svg.Color("rgb(255,0,155)")]
-	zero_line_colors = [svg.Color("#ff0"), svg.Color("#0ff")]
+	_prefix_ids(svg_doc, ID)
+
+	errorcode = 0
 
 	# extract the fill color for fillable components
 	for element in svg_doc.findall(".//*[@fill='#0f0']"):
@@ -132,43 +189,36 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 		element.set("fill", "none")
 
 	# all lines which are not text or zero lines
-	pin_lines = [
-		line
-		for line in lines
-		if all([svg.Color.distance_sq(line["color"], c) != 0 for c in (zero_line_colors + text_line_colors)])
-	]
+	pin_lines = [line for line in lines if _pack_rgb(line["color"]) not in _RESERVED_LINE_RGBS]
 	ref_point = find_matching_line_point(lines)
 	zero_coordinate = svg.Point(0, 0)
 
-	pin_anchors = (
-		["START", "END", *(node_description["pins"] if "pins" in node_description else [])]
-		if not is_node
-		else (node_description["pins"] if "pins" in node_description else [])
-	)
+	pin_anchors = description_pins if is_node else ["START", "END", *description_pins]
 	pin_anchors = [anchor_name for anchor_name in pin_anchors if anchor_name != "center"]
 	pin_anchors = [Pin_Anchor(anchor_name, None, False) for anchor_name in pin_anchors]
 
+	ref_x = ref_point.x
+	ref_y = ref_point.y
 	for line in pin_lines:
-		# sort line start/end; end=relevant point
-		if not are_two_points_close(line["start"], ref_point):
-			# unsorted
-			if are_two_points_close(line["end"], ref_point):
-				line["end"] = line["start"]
-				line["start"] = ref_point
-			else:
-				print(f"Error parsing line ({tikz_name}): {line['start']}; {line['end']}; {line['color']}")
-				errorcode = 1
-
-		index = color_to_index(line["color"])
-		pin_anchor = pin_anchors[index]
-
-		if pin_anchor is not None:
-			pin_anchor.point = line["end"] - ref_point
+		# the endpoint away from the reference point is the pin position
+		start = line["start"]
+		end = line["end"]
+		if abs(start.x - ref_x) <= 1e-6 and abs(start.y - ref_y) <= 1e-6:
+			tip = end
+		elif abs(end.x - ref_x) <= 1e-6 and abs(end.y - ref_y) <= 1e-6:
+			tip = start
 		else:
-			raise ("No matching pin description found for line color: " + line["color"])
+			print(f"Error parsing line ({tikz_name}): {start}; {end}; {line['color']}")
+			errorcode = 1
+			tip = end
+
+		anchor_index = color_to_index(line["color"])
+		if anchor_index >= len(pin_anchors):
+			raise ValueError(f"No matching pin description found for line color: {line['color']}")
+		pin_anchors[anchor_index].point = tip - ref_point
 
 	# add center anchor back as pin, if indicated by nodeDescription
-	if "pins" in node_description and "center" in node_description["pins"]:
+	if "center" in description_pins:
 		pin_anchors.append(Pin_Anchor("center", zero_coordinate, False))
 
 	has_default = False
@@ -179,19 +229,9 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 			has_default = True
 			pin_anchor.default = True
 
-	shape_name = (
-		None
-		if is_node
-		else (
-			node_description["shapeName"]
-			if "shapeName" in node_description
-			else node_description["drawName"].replace(" ", "") + "shape"
-		)
-	)
-
-	# build dom tree for metadata
+	shape_name = None if is_node else node_description.get("shapeName", tikz_name.replace(" ", "") + "shape")
 
-	metadata: ET.Element = svg_doc.makeelement("metadata", {})
+	# build dom tree for the metadata sidecar
 	# fill in attributes
 	componentInfo: ET.Element = svg_doc.makeelement("componentInformation", {})
 	componentInfo.set("type", "node" if is_node else "path")
@@ -213,9 +253,10 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 	componentInfo.set("viewBox", svg_doc.get("viewBox"))
 
 	# fill in options
-	if "options" in node_description:
+	if description_options is not None:
+		active_option_names = {option["name"] for option in option_possibility}
 		tikz_options = svg_doc.makeelement("options", {})
-		for option in node_description["options"]:
+		for option in description_options:
 			if "enumOptions" in option:
 				enum: ET.Element = svg_doc.makeelement("enumopt", {})
 				if "selectNone" in option:
@@ -225,13 +266,11 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 
 				for enum_option in option["enumOptions"]:
 					enum.append(
-						_convert_option(enum_option, is_option_active(enum_option["name"], option_possibility), svg_doc)
+						_convert_option(enum_option, enum_option["name"] in active_option_names, svg_doc)
 					)
 				tikz_options.append(enum)
 			else:
-				tikz_options.append(
-					_convert_option(option, is_option_active(option["name"], option_possibility), svg_doc)
-				)
+				tikz_options.append(_convert_option(option, option["name"] in active_option_names, svg_doc))
 		componentInfo.append(tikz_options)
 
 	# fill in pins
@@ -251,7 +290,7 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 
 		##############################
 
-	text_line = [line for line in lines if svg.Color.distance_sq(line["color"], text_line_colors[0]) == 0]
+	text_line = [line for line in lines if _pack_rgb(line["color"]) == _TEXT_LINE_RGB]
 	if len(text_line) > 0:
 		text_point: svg.Point = text_line[0]["end"] - ref_point
 		text_position: ET.Element = svg_doc.makeelement("textpos", {})
@@ -259,27 +298,21 @@ def _convert_SVG_to_symbol_worker(svg_content: str, index, is_node, node_descrip
 		text_position.set("y", f"{text_point.y:.5f}")
 		componentInfo.append(text_position)
 
-	metadata.append(componentInfo)
-	svg_doc.append(metadata)
+	# the symbol id the metadata belongs to; lets the combiner work from the sidecar alone
+	componentInfo.set("for", ID)
 
 	# - put it all together ---
-	if ID is None:
-		ID = component_name_from_info(
-			None,
-			node_description["name"] if is_node else node_description["drawName"],
-			is_node,
-			node_description["options"],
-		)
-
 	svg_symbol: ET.Element = svg_doc.makeelement("symbol", {})
 	svg_symbol.set("id", ID)
 
-	for child in svg_doc:
+	# list() is required here: appending to the symbol moves the child out of svg_doc
+	for child in list(svg_doc):
 		svg_symbol.append(child)
 
 	return (
 		errorcode,
 		ET.tostring(svg_symbol, encoding="unicode"),
+		ET.tostring(componentInfo, encoding="unicode"),
 	)
 
 
@@ -296,109 +329,142 @@ def _convert_option(option: dict, active: bool, doc: ET.Element) -> ET.Element:
 	return option_element
 
 
-def _convert_DVI_to_symbol_worker(path: pathlib.Path):
-	# convert from dvi to svg
-	# then convert the svg to a symbol
-	svg_content = _compile_DVI_to_SVG_worker(path)
-	doc = dom.parseString(svg_content).getElementsByTagName("svg")[0]
-
-	view_box_array = re.split(r" +", doc.getAttribute("viewBox"))
+@functools.lru_cache(maxsize=None)
+def _symbol_info_by_name(index: int, is_node: bool):
+	"""
+	Maps every generated file name of the component at the given index to its
+	fully resolved (node_description, option_possibility, ID) triple, so a
+	file stem resolves with a single dict lookup instead of re-generating
+	names and re-applying the pin options until one matches.
+	"""
+	node_description = get_nodes_and_paths()["nodes" if is_node else "path"][index]
+	tikz_name = node_description["name"] if is_node else node_description["drawName"]
+	possibilities = {}
+	for option_possibility in options_object_to_array(node_description.get("options", [])):
+		optionsDisplay = [
+			option["displayName"] if "displayName" in option else option["name"] for option in option_possibility
+		]
+
+		addPins = []
+		subPins = set()
+		for option in option_possibility:
+			if "addPins" in option:
+				addPins.extend(option["addPins"])
+			if "subPins" in option:
+				subPins.update(option["subPins"])
+
+		description = node_description.copy()
+		description["pins"] = [pin for pin in node_description.get("pins", []) if pin not in subPins]
+		description["pins"].extend(addPins)
+
+		name = component_name_from_info(index, tikz_name, is_node, optionsDisplay)
+		ID = component_name_from_info(None, tikz_name, is_node, optionsDisplay)
+		possibilities[name] = (description, option_possibility, ID)
+	return possibilities
+
+
+def _prepare_DVI_worker(path: pathlib.Path):
+	# convert from dvi to svg and stage the result for the batched svgo pass
+	svg_content = _compile_DVI_to_SVG_worker(path, scale=4 / 3)
+
+	view_box_match = re.search(r"viewBox='([^']*)'", svg_content)
+	# viewBox is whitespace-separated; str.split() handles runs of whitespace without the regex engine
+	view_box_array = view_box_match.group(1).split() if view_box_match is not None else []
 	if len(view_box_array) != 4:
 		raise ValueError("SVG has no viewBox")
 
 	translate_x = -float(view_box_array[0])
 	translate_y = -float(view_box_array[1])
 
-	svg_content = _compile_DVI_to_SVG_worker(path, translateX=translate_x, translateY=translate_y, scale=4 / 3)
+	# shift the content to the origin in the SVG itself instead of re-running dvisvgm with --translate;
+	# the svgo pass bakes the transform into the path data (convertPathData with applyTransforms)
+	svg_content = svg_content.replace(
+		view_box_match.group(0), f"viewBox='0 0 {view_box_array[2]} {view_box_array[3]}'", 1
+	)
+	if translate_x != 0 or translate_y != 0:
+		svg_content = re.sub(
+			r"(<svg[^>]*>)", rf"\1<g transform='translate({translate_x},{translate_y})'>", svg_content, count=1
+		)
+		svg_content = svg_content.replace("</svg>", "</g></svg>")
 	# regular expression that matches the xmlns attribute in the svg_content (<svg ... xmlns='...' ... >...)
 	svg_content = re.sub(r"\s+xmlns='[^']+'", "", svg_content, count=1)
 
-	# get node information (name, pins, ...)
-	index, is_node = parse_filename(path.stem)
-	if is_node:
-		node_description: dict = NODES_AND_PATHS["nodes"][index]
-	else:
-		node_description: dict = NODES_AND_PATHS["path"][index]
-
-	option_possibilities = options_object_to_array(node_description["options"] if "options" in node_description else [])
-
-	for option_possibility in option_possibilities:
-		optionsDisplay = list(
-			map(lambda option: option["displayName"] if "displayName" in option else option["name"], option_possibility)
-		)
-		name = component_name_from_info(
-			index, node_description["name"] if is_node else node_description["drawName"], is_node, optionsDisplay
-		)
-
-		if name == path.stem:
-			break
-
-	addPins = []
-	subPins = []
-	for option in option_possibility:
-		if "addPins" in option:
-			addPins.extend(option["addPins"])
-		if "subPins" in option:
-			subPins.extend(option["subPins"])
+	with open(path.parent / _SVGO_BATCH_DIR / (path.stem + ".svg"), "w") as f:
+		f.write(svg_content)
 
-	node_description_copy = node_description.copy()
-	if "pins" in node_description_copy:
-		node_description_copy["pins"] = [pin for pin in node_description["pins"] if pin not in subPins]
-	else:
-		node_description_copy["pins"] = []
-	node_description_copy["pins"].extend(addPins)
+	return 0
 
-	ID = component_name_from_info(
-		None, node_description["name"] if is_node else node_description["drawName"], is_node, optionsDisplay
-	)
 
-	svgo_config = copy.deepcopy(SVGO_BASE_CONFIG)
-	svgo_config["plugins"].append(
-		{
-			"name": "prefixIds",
-			"params": {
-				"delim": "_",
-				"prefix": ID,
-				"prefixIds": True,
-				"prefixClassNames": True,
-			},
-		}
-	)
+def _convert_optimized_SVG_worker(path: pathlib.Path):
+	# convert a batch-optimized svg into its final symbol and metadata sidecar
+	staged_path = path.parent / _SVGO_BATCH_DIR / (path.stem + ".svg")
+	svg_content = staged_path.read_text()
 
-	config_name = f"{name}.config.js"
-	with open(path.parent / config_name, "w") as f:
-		f.write("module.exports=" + json.dumps(svgo_config, indent=4))
+	# get node information (name, pins, ...)
+	index, is_node = parse_filename(path.stem)
+	node_description, option_possibility, ID = _symbol_info_by_name(index, is_node)[path.stem]
 
-	command = ["svgo", "--config", config_name, "-i", "-", "-o", "-"]
-	p = subprocess.Popen(
-		command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, cwd=path.parent
+	returncode, svg_content, meta_content = _convert_SVG_to_symbol_worker(
+		svg_content, index, is_node, node_description, ID, option_possibility
 	)
-	out, err = p.communicate(input=svg_content.encode())
-	svg_content = out.decode()
-	(path.parent / config_name).unlink()
-	returncode = p.returncode
-	if p.returncode == 0:
-		returncode, svg_content = _convert_SVG_to_symbol_worker(
-			svg_content, index, is_node, node_description_copy, ID, option_possibility
-		)
 
-		if svg_content:
-			with open(path.parent / (path.stem + ".svg"), "w") as f:
-				f.write(svg_content)
-	else:
-		print(f"Error while svg optimizing {path.stem}:", out.decode())
+	if svg_content:
+		with open(path.parent / (path.stem + ".svg"), "w") as f:
+			f.write(svg_content)
+		# metadata sidecar; read by combine_SVGs_to_symbol instead of re-parsing the symbol body
+		with open(path.parent / (path.stem + ".meta.xml"), "w") as f:
+			f.write(meta_content)
 
 	return returncode
 
 
 def convert_DVI_to_SVGs():
 	# call this from the main script
-	all_files = glob.glob("build/*.dvi")
-	all_files = filter_newer(all_files, ".svg")
-	# _convert_DVI_to_symbol_worker(pathlib.Path(all_files[0]))
-	results = thread_map(
-		_convert_DVI_to_symbol_worker, all_files, desc="Converting .dvi files", unit="file", smoothing=0.1
-	)
+	build_dir = pathlib.Path("build")
+	build_dir.mkdir(exist_ok=True)
+	# a single directory scan provides both the .dvi listing and the freshness check against .svg outputs
+	with os.scandir(build_dir) as entries:
+		names = {entry.name for entry in entries}
+	all_files = [
+		build_dir / name for name in sorted(names) if name.endswith(".dvi") and f"{name[:-4]}.svg" not in names
+	]
+	# the svgo config is identical for every file since id prefixing happens in Python; write it once per run
+	config_path = build_dir / _SVGO_CONFIG_NAME
+	with open(config_path, "w") as f:
+		f.write("module.exports=" + json.dumps(SVGO_BASE_CONFIG))
+	staging_dir = build_dir / _SVGO_BATCH_DIR
+	staging_dir.mkdir(exist_ok=True)
+
+	results = thread_map(_prepare_DVI_worker, all_files, desc="Converting .dvi files", unit="file", smoothing=0.1)
+
+	# one svgo run over the staging folder instead of one Node startup per file
+	if len(all_files) > 0:
+		p = subprocess.run(
+			["svgo", "--config", _SVGO_CONFIG_NAME, "-f", _SVGO_BATCH_DIR],
+			capture_output=True,
+			check=False,
+			cwd=build_dir,
+		)
+		if p.returncode != 0:
+			print("Error while svg optimizing:", p.stderr.decode())
+			results.append(p.returncode)
+		else:
+			# the symbol conversion is pure Python/lxml work and holds the GIL, so it runs in
+			# processes; the dvisvgm phase above stays on threads since it waits on subprocesses
+			results.extend(
+				process_map(
+					_convert_optimized_SVG_worker,
+					all_files,
+					desc="Converting symbols",
+					unit="file",
+					smoothing=0.1,
+					max_workers=os.cpu_count(),
+					chunksize=4,
+				)
+			)
+
+	shutil.rmtree(staging_dir)
+	config_path.unlink()
 	errors = [r for r in results if r != 0]
 	if len(errors) > 0:
 		print(f"A total of {len(errors)} errors occurred during compilation:")
@@ -406,109 +472,94 @@ def convert_DVI_to_SVGs():
 		print("Sucessfully converted all .dvi files to .svg files!")
 
 
+def _read_symbol_worker(file: str):
+	file_path = pathlib.Path(file)
+	return file_path.read_text(), file_path.with_name(file_path.stem + ".meta.xml").read_bytes()
+
+
 def combine_SVGs_to_symbol():
 	header = '<?xml version="1.0" encoding="UTF-8" standalone="yes" ?>\n<svg\n\tversion="1.1"\n\txmlns="http://www.w3.org/2000/svg"\n\txmlns:xlink="http://www.w3.org/1999/xlink">\n\t<defs>\n'
-	footer = "\n\t</defs>\n</svg>"
-
 	all_files = glob.glob("build/*.svg")
-	contents = []
-	for file in all_files:
-		with open(file) as f:
-			contents.extend(f.readlines())
-
-	contents = map(lambda line: "\t\t" + line, contents)
-	filecontents = header + "\n".join(contents) + footer
-
-	doc = dom.parseString(filecontents)
-	symbols = doc.getElementsByTagName("symbol")
-
-	clusteredSymbols: dict[str, list[dom.Element]] = {}
-	for symbol in symbols:
-		info = symbol.getElementsByTagName("componentInformation")[0]
-		tikzname = info.getAttribute("tikz")
-		if tikzname in clusteredSymbols:
-			clusteredSymbols[tikzname].append(symbol)
-		else:
-			clusteredSymbols[tikzname] = [symbol]
-
-	metadata = doc.createElement("metadata")
-
-	for key, clusteredSymbol in clusteredSymbols.items():
-		firstSymbol = clusteredSymbol[0]
-		firstComponentInfo = firstSymbol.getElementsByTagName("componentInformation")[0]
-		component = doc.createElement("component")
-		symbol_type = firstComponentInfo.getAttribute("type")
-		component.setAttribute("type", symbol_type)
-		component.setAttribute("display", firstComponentInfo.getAttribute("display"))
-		component.setAttribute("tikz", firstComponentInfo.getAttribute("tikz"))
-		component.setAttribute("group", firstComponentInfo.getAttribute("group"))
+	# The symbol bodies are already svgo-optimized and carry no metadata anymore, so they are
+	# concatenated as raw text; only the small .meta.xml sidecars are parsed here.
+	# Reading is pure IO, so a thread pool overlaps the file accesses.
+	buffer = io.StringIO()
+	buffer.write(header)
+	clusteredInfos: dict[str, list[ET.Element]] = {}
+	with ThreadPoolExecutor() as executor:
+		for file_content, meta_content in executor.map(_read_symbol_worker, all_files):
+			buffer.write(file_content)
+			buffer.write("\n")
+			info = ET.fromstring(meta_content)
+			tikzname = info.get("tikz")
+			if tikzname in clusteredInfos:
+				clusteredInfos[tikzname].append(info)
+			else:
+				clusteredInfos[tikzname] = [info]
+
+	metadata = ET.Element("metadata")
+
+	for key, clusteredInfo in clusteredInfos.items():
+		firstComponentInfo = clusteredInfo[0]
+		# snapshot the attributes once instead of issuing a tree lookup per get
+		first_attrs = firstComponentInfo.attrib
+		component = ET.SubElement(metadata, "component")
+		symbol_type = first_attrs.get("type")
+		component.set("type", symbol_type)
+		component.set("display", first_attrs.get("display", ""))
+		component.set("tikz", first_attrs.get("tikz", ""))
+		component.set("group", first_attrs.get("group", ""))
 		if symbol_type == "path":
-			component.setAttribute("shape", firstComponentInfo.getAttribute("shape"))
-		if firstComponentInfo.hasAttribute("class"):
-			component.setAttribute("class", firstComponentInfo.getAttribute("class"))
-		if firstComponentInfo.hasAttribute("fillable"):
-			component.setAttribute("fillable", firstComponentInfo.getAttribute("fillable"))
-		if firstComponentInfo.hasAttribute("source"):
-			component.setAttribute("source", firstComponentInfo.getAttribute("source"))
-
-		tikz_options = firstSymbol.getElementsByTagName("options")
-		if len(tikz_options) > 0 and tikz_options[0].hasChildNodes():
-			try:
-				tikz_options[0].removeAttribute("xmlns:ci")
-			except BaseException:
-				pass
-			component.appendChild(tikz_options[0].cloneNode(True))
-
-		for symbol in clusteredSymbol:
-			variant = doc.createElement("variant")
-
-			componentInfo = symbol.getElementsByTagName("componentInformation")[0]
-			ref_x = float(componentInfo.getAttribute("refX"))
-			ref_y = float(componentInfo.getAttribute("refY"))
+			component.set("shape", first_attrs.get("shape", ""))
+		for attribute in ("class", "fillable", "source"):
+			value = first_attrs.get(attribute)
+			if value is not None:
+				component.set(attribute, value)
+
+		tikz_options = firstComponentInfo.find("options")
+		if tikz_options is not None and len(tikz_options) > 0:
+			component.append(copy.deepcopy(tikz_options))
+
+		for componentInfo in clusteredInfo:
+			variant = ET.SubElement(component, "variant")
+
+			info_attrs = componentInfo.attrib
+			ref_x = float(info_attrs.get("refX"))
+			ref_y = float(info_attrs.get("refY"))
 			if ref_x != 0:
-				variant.setAttribute("x", str(ref_x))
+				variant.set("x", str(ref_x))
 			if ref_y != 0:
-				variant.setAttribute("y", str(ref_y))
-			variant.setAttribute("viewBox", componentInfo.getAttribute("viewBox"))
+				variant.set("y", str(ref_y))
+			variant.set("viewBox", info_attrs.get("viewBox"))
 
-			variant.setAttribute("for", symbol.getAttribute("id"))
-			activeOptions = symbol.getElementsByTagName("option")
+			variant.set("for", info_attrs.get("for"))
+			activeOptions = list(componentInfo.iter("option"))
 			for option in activeOptions:
-				if option.hasAttribute("active"):
-					option.removeAttribute("active")
-					if option.hasAttribute("display"):
-						option.removeAttribute("display")
-					variant.appendChild(option)
+				if option.get("active") is not None:
+					del option.attrib["active"]
+					option.attrib.pop("display", None)
+					variant.append(option)
 
-			pins = symbol.getElementsByTagName("pin")
+			pins = componentInfo.findall(".//pin")
 			for pin in pins:
-				variant.appendChild(pin)
-			textPosition = symbol.getElementsByTagName("textpos")
-			if textPosition.length > 0:
-				variant.appendChild(textPosition[0])
+				variant.append(pin)
+			textPosition = componentInfo.find("textpos")
+			if textPosition is not None:
+				variant.append(textPosition)
 
-			component.appendChild(variant)
-
-		metadata.appendChild(component)
-
-	metaDataElements = doc.getElementsByTagName("metadata")
-	for element in metaDataElements:
-		element.parentNode.removeChild(element)
-
-	doc.getElementsByTagName("svg")[0].appendChild(metadata)
+	buffer.write("\t</defs>\n")
+	buffer.write(ET.tostring(metadata, encoding="unicode"))
+	buffer.write("\n</svg>")
 
 	config_name = "symbols.config.js"
 	with open(config_name, "w") as f:
-		f.write("module.exports=" + json.dumps(SVGO_CONFIG, indent=4))
+		f.write("module.exports=" + json.dumps(SVGO_CONFIG))
 
 	command = ["svgo", "--config", config_name, "-i", "-", "-o", "-"]
-	p = subprocess.Popen(
-		command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, cwd="."
-	)
-	out, err = p.communicate(input=doc.toxml().encode())
-	svg_content = out.decode()
+	p = subprocess.run(command, input=buffer.getvalue().encode(), capture_output=True, check=False, cwd=".")
+	svg_content = p.stdout.decode()
 	if p.returncode != 0:
-		print(f"Error combining symbols to SVG:\n{err.decode()}")
+		print(f"Error combining symbols to SVG:\n{p.stderr.decode()}")
 		return
 
 	with open("symbols.svg", "w") as f:
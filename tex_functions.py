@@ -3,7 +3,7 @@ import glob
 import os
 import pathlib
 import subprocess
-from utils import NODES_AND_PATHS, component_name_from_info, filter_newer, index_to_color, options_object_to_array
+from utils import component_name_from_info, filter_newer, get_nodes_and_paths, index_to_color, options_object_to_array
 
 
 def _compile_worker(path: pathlib.Path):
@@ -15,11 +15,11 @@ def _compile_worker(path: pathlib.Path):
 		"-halt-on-error",
 		"-output-format=dvi",
 		"-interaction=nonstopmode",
-		f'-jobname="{path.stem}"',
+		f"-jobname={path.stem}",
 		path.absolute(),
 	]
-	p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, cwd=path.parent)
-	out, _ = p.communicate()
+	p = subprocess.run(command, capture_output=True, check=False, cwd=path.parent)
+	out = p.stdout
 
 	# remove auxiliary files
 	extensionBlacklist = [".aux", ".log", ".tmp", ".toc"]
@@ -57,7 +57,7 @@ def create_tex_files_from_json(output_dir="build"):
 		node_stencil = f.read()
 
 	# Iterate through each node in the JSON data
-	for index, node in enumerate(NODES_AND_PATHS["nodes"]):
+	for index, node in enumerate(get_nodes_and_paths()["nodes"]):
 		fillable = node["fillable"] if "fillable" in node else False
 		option_possibilities = options_object_to_array(node["options"] if "options" in node else [])
 		for tmp, option_possibility in enumerate(option_possibilities):
@@ -69,12 +69,12 @@ def create_tex_files_from_json(output_dir="build"):
 			basename = component_name_from_info(index, node["name"], True, options_display)
 
 			addPins = []
-			subPins = []
+			subPins = set()
 			for option in option_possibility:
 				if "addPins" in option:
 					addPins.extend(option["addPins"])
 				if "subPins" in option:
-					subPins.extend(option["subPins"])
+					subPins.update(option["subPins"])
 
 			anchorLines = ""
 			if "pins" in node and len(node["pins"]) > 0:
@@ -100,7 +100,7 @@ def create_tex_files_from_json(output_dir="build"):
 		path_stencil = f.read()
 
 	# Iterate through each path in the JSON data
-	for index, path in enumerate(NODES_AND_PATHS["path"]):
+	for index, path in enumerate(get_nodes_and_paths()["path"]):
 		fillable = node["fillable"] if "fillable" in path else False
 		option_possibilities = options_object_to_array(path["options"] if "options" in path else [])
 		for tmp, option_possibility in enumerate(option_possibilities):
@@ -115,12 +115,12 @@ def create_tex_files_from_json(output_dir="build"):
 			basename = component_name_from_info(index, path["drawName"], False, options_display)
 
 			addPins = []
-			subPins = []
+			subPins = set()
 			for option in option_possibility:
 				if "addPins" in option:
 					addPins.extend(option["addPins"])
 				if "subPins" in option:
-					subPins.extend(option["subPins"])
+					subPins.update(option["subPins"])
 
 			anchorLines = ""
 			start = path["start"] if "start" in path else "b"
@@ -1,25 +1,59 @@
 # Utility functions
 from jsonc_parser.parser import JsoncParser
+import functools
+import itertools
 import re
 import os
 import pathlib
 from svgelements import Color, Point
 
-NODES_AND_PATHS = JsoncParser.parse_file("nodes.jsonc")
+# matches the characters component_name_from_info replaces with "-"
+_NON_WORD = re.compile(r"\W")
+
+# the same \W -> "-" mapping as a translation table for ASCII input,
+# which str.translate applies in a single C loop without the regex engine
+_NON_WORD_ASCII_TABLE = str.maketrans(
+	{codepoint: "-" for codepoint in range(128) if not (chr(codepoint).isalnum() or chr(codepoint) == "_")}
+)
+
+
+def _scrub_non_word(part: str) -> str:
+	if part.isascii():
+		# common case: the part is already word-safe and needs no substitution at all
+		if part.replace("_", "a").isalnum():
+			return part
+		return part.translate(_NON_WORD_ASCII_TABLE)
+	# \W is Unicode-aware, so non-ASCII strings keep the regex semantics
+	return _NON_WORD.sub("-", part)
+
+
+# Parses nodes.jsonc on first access instead of at import time, so importing the module
+# (e.g. in worker processes) does not pay for the jsonc tokenization again and again.
+@functools.cache
+def get_nodes_and_paths() -> dict:
+	return JsoncParser.parse_file("nodes.jsonc")
 
 
 # Generates a component name based on the index, id, and options.
 # Example: component_name_from_info(1, "id", True, ["option1", "option2"]) -> "node_001_id_option1-option2"
 #          component_name_from_info(2, "id", False, ["option1"]) -> "path_002_id_option1"
 def component_name_from_info(index: int, id: str, isnode=True, options=[]):
-	basename_array = ["node" if isnode else "path"]
+	# the cache needs hashable arguments, so the options list becomes a tuple
+	prefix, suffix = _component_name_parts(id, isnode, tuple(options))
 	if index is not None:
-		basename_array.append(f"{index:03d}")
-	basename_array.append(id)
+		return f"{prefix}_{index:03d}_{suffix}"
+	return f"{prefix}_{suffix}"
+
+
+# cached without the index, so the scrubbed id/options work is shared across all indices
+@functools.lru_cache(maxsize=None)
+def _component_name_parts(id: str, isnode: bool, options: tuple):
+	# only the id and the option names can contain non-word characters;
+	# the node/path literal and the zero-padded index are already word-safe
+	suffix = _scrub_non_word(id)
 	if len(options) > 0:
-		basename_array.append("_".join(options))
-	basename_array = [re.sub(r"\W", "-", part) for part in basename_array]  # Remove spaces from each part
-	return "_".join(basename_array)
+		suffix = f"{suffix}_{_scrub_non_word('_'.join(options))}"
+	return "node" if isnode else "path", suffix
 
 
 # Parses a filename in the format "node_001_id_option1-option2" or "path_001_id_option1-option2"
@@ -31,10 +65,17 @@ def parse_filename(filename):
 	return int(parts[1]), (parts[0] == "node")
 
 
+# All 64 anchor colors, pre-parsed; indexing replaces formatting + parsing an rgb() string per call.
+_INDEX_COLORS = tuple(Color(f"rgb({index << 2},{0x99},{0x99})") for index in range(64))
+
+
 def index_to_color(index) -> Color:
 	# Convert index to a color in RGB format. the index is expected to be in [0, 63]. r = 4*index, g = 153, b = 153.
-	r = index << 2
-	return Color(f"rgb({r},{0x99},{0x99})")
+	return _INDEX_COLORS[index]
+
+
+# All 64 valid anchor colors keyed by their packed RGB value ((r << 16) | (g << 8) | b).
+_RGB_TO_INDEX = {((index << 2) << 16) | (0x99 << 8) | 0x99: index for index in range(64)}
 
 
 # Converts a color in RGB format to an index. r = 4*index, g = 153, b = 153.
@@ -43,52 +84,63 @@ def index_to_color(index) -> Color:
 #          (252, 153, 153) -> 63
 # Raises ValueError if the color format is invalid.
 def color_to_index(color: Color):
-	if color.red & 0x3 != 0 or color.green != 0x99 or color.blue != 0x99:
+	index = _RGB_TO_INDEX.get((color.red << 16) | (color.green << 8) | color.blue)
+	if index is None:
 		raise ValueError("Invalid color format. Expected RGB with r in [0, 252], g=153, b=153.")
-	return color.red >> 2
+	return index
 
 
 def filter_newer(files: list[str], target_file_extension: str):
-	paths = [pathlib.Path(f) for f in files]
 	target_file_extension = target_file_extension.lstrip(".")
-	return [p for p in paths if not os.path.isfile(p.parent / f"{p.stem}.{target_file_extension}")]
+	# one directory scan per distinct parent instead of one stat syscall per file;
+	# the loop sticks to C-level string operations and only builds Path objects for the survivors
+	existing_by_parent: dict[str, set[str]] = {}
+	result = []
+	for file in files:
+		file = os.fspath(file)
+		parent, name = os.path.split(file)
+		existing = existing_by_parent.get(parent)
+		if existing is None:
+			with os.scandir(parent if parent else ".") as entries:
+				existing = {entry.name for entry in entries}
+			existing_by_parent[parent] = existing
+		stem = os.path.splitext(name)[0]
+		if f"{stem}.{target_file_extension}" not in existing:
+			result.append(pathlib.Path(file))
+	return result
 
 
 def options_object_to_array(
 	options,
 ) -> list[list[dict]]:
-	if not isinstance(options, list) or len(options) == 0:
+	if not isinstance(options, list):
 		return [[]]
 
-	current_option = options[0]
-	converted_options = options_object_to_array(options[1:])
-
-	result = []
-
-	if "enumOptions" in current_option:
-		for option in current_option["enumOptions"]:
-			for converted_option in converted_options:
-				optionsArray = [option]
-				optionsArray.extend(converted_option)
-				result.append(optionsArray)
-
-		if "selectNone" not in current_option or current_option["selectNone"]:
-			for converted_option in converted_options:
-				result.append(converted_option)
-	else:
-		for convertedOption in converted_options:
-			options_array = [current_option]
-			options_array.extend(convertedOption)
-			result.append(options_array)
-			result.append(convertedOption)
+	# when every option is a mandatory enum the result is a pure cartesian product,
+	# which itertools.product generates in C with the same ordering
+	if all("enumOptions" in option and not option.get("selectNone", True) for option in options):
+		return [list(combination) for combination in itertools.product(*(option["enumOptions"] for option in options))]
+
+	# build the combinations iteratively from right to left: each option extends the tails
+	# produced so far, so every tail list is generated once instead of per recursion level
+	result = [[]]
+	for current_option in reversed(options):
+		extended = []
+		if "enumOptions" in current_option:
+			for option in current_option["enumOptions"]:
+				for tail in result:
+					extended.append([option, *tail])
+
+			if "selectNone" not in current_option or current_option["selectNone"]:
+				extended.extend(result)
+		else:
+			for tail in result:
+				extended.append([current_option, *tail])
+				extended.append(tail)
+		result = extended
 
 	return result
 
 
 def are_two_points_close(pointA: Point, pointB: Point, eps=1e-6):
-	return (
-		(pointA.x >= pointB.x - eps)
-		and (pointA.x <= pointB.x + eps)
-		and (pointA.y >= pointB.y - eps)
-		and (pointA.y <= pointB.y + eps)
-	)
+	return abs(pointA.x - pointB.x) <= eps and abs(pointA.y - pointB.y) <= eps